@@ -1,13 +1,86 @@
 # Import required libraries
-import seaborn as sns  # For data visualization (scatterplot)
+import functools  # For caching filter results across input changes
+import io  # For saving the rendered scatterplot in memory
 from faicons import icon_svg  # For displaying icons in the UI
+import matplotlib  # For choosing the plotting backend
+matplotlib.use("Agg")  # Plots are only ever saved as images, so skip loading an interactive backend
+from matplotlib.figure import Figure  # For drawing the scatterplot on a reusable figure
 from shiny import reactive  # For reactive programming (used for updating UI based on inputs)
 from shiny.express import input, render, ui  # For creating UI components and rendering outputs in Shiny for Python
-import palmerpenguins  # For loading the penguins dataset
+import numpy as np  # For fast array operations on the filter columns
+from PIL import Image  # For handing cached scatterplot PNGs to the plot renderer
+import pandas as pd  # For reading the penguins dataset
+from pathlib import Path  # For locating files next to this app
 import shinyswatch  # For using different themes in Shiny apps
 
-# Load the Palmer Penguins dataset
-df = palmerpenguins.load_penguins()
+app_dir = Path(__file__).parent
+
+# Columns shown in the data grid (the only columns the app needs)
+DISPLAY_COLS = [
+    "species",  # Species of penguins
+    "island",  # Island where the penguins were found
+    "bill_length_mm",  # Bill length in mm
+    "bill_depth_mm",  # Bill depth in mm
+    "body_mass_g",  # Body mass in grams
+]
+
+# Load the Palmer Penguins dataset from the CSV bundled with the app, which starts faster than
+# importing palmerpenguins: only the needed columns are parsed, species and island straight
+# to categoricals so filters compare integer codes, not strings
+df = pd.read_csv(
+    app_dir / "penguins.csv",
+    usecols=DISPLAY_COLS,
+    dtype={"species": "category", "island": "category"},
+)
+
+# Drop the rows with missing measurements once (they never pass the mass filter anyway)
+df = df.dropna(subset=["bill_length_mm", "bill_depth_mm", "body_mass_g", "species"]).reset_index(drop=True)
+
+# Body mass is whole grams with no missing values left, so int16 holds it exactly in a quarter
+# of the bytes (bill columns stay float64, otherwise the data grid would show 39.099998 for 39.1)
+df["body_mass_g"] = df["body_mass_g"].astype("int16")
+
+# Keep NumPy arrays of the filter columns so the reactive filter skips pandas indexing
+# (row positions per species, so unselected species are never visited)
+SPECIES_IDX = {
+    sp: np.flatnonzero((df["species"] == sp).to_numpy())
+    for sp in df["species"].cat.categories
+}
+MASS_ARR = df["body_mass_g"].to_numpy()
+BILL_LENGTH_ARR = df["bill_length_mm"].to_numpy()
+BILL_DEPTH_ARR = df["bill_depth_mm"].to_numpy()
+
+# For each species, sort rows by body mass and keep running totals of bill length and depth,
+# so the value boxes can answer any mass threshold with a binary search instead of a scan
+MASS_ORDER = {sp: idx[np.argsort(MASS_ARR[idx], kind="stable")] for sp, idx in SPECIES_IDX.items()}
+SPECIES_STATS = {}
+for sp, order in MASS_ORDER.items():
+    SPECIES_STATS[sp] = (
+        MASS_ARR[order],  # Body mass, ascending
+        np.concatenate([[0.0], np.cumsum(BILL_LENGTH_ARR[order])]),  # Running sums, starting at 0
+        np.concatenate([[0.0], np.cumsum(BILL_DEPTH_ARR[order])]),
+    )
+
+# Custom colors for species
+SPECIES_COLORS = {"Adelie": "#858ae3", "Gentoo": "#83c5be", "Chinstrap": "#023e8a"}
+
+# Draw every penguin once on a reusable figure, one collection per species with its points in
+# body mass order, so an update only has to show the first points of each collection
+SCATTER_DPI = 72  # Low DPI (1 point per CSS pixel) bounds the drawing cost
+SCATTER_FIG = Figure(dpi=SCATTER_DPI, layout="tight")  # Sized to the card on each render
+SCATTER_AX = SCATTER_FIG.subplots(subplot_kw={"xlabel": "bill_length_mm", "ylabel": "bill_depth_mm"})
+SCATTER_POINTS = {}
+for sp, color in SPECIES_COLORS.items():
+    offsets = np.column_stack([BILL_LENGTH_ARR[MASS_ORDER[sp]], BILL_DEPTH_ARR[MASS_ORDER[sp]]])
+    points = SCATTER_AX.scatter(
+        offsets[:, 0],
+        offsets[:, 1],
+        color=color,
+        edgecolors="white",
+        label=sp,
+        rasterized=True,  # Keeps vector output to one embedded image instead of a path per point
+    )
+    SCATTER_POINTS[sp] = (points, offsets)
 
 # Set up the page options (title, fillable layout, and theme)
 ui.page_opts(
@@ -76,7 +149,7 @@ with ui.layout_column_wrap(fill=False):
         # Reactive function to return the number of rows in the filtered dataset
         @render.text
         def count():
-            return filtered_df().shape[0]  # Count the number of penguins after filtering
+            return _stats()[0]  # Count the number of penguins after filtering
 
     # Value box showing the average bill length of the filtered penguins
     with ui.value_box(
@@ -88,7 +161,7 @@ with ui.layout_column_wrap(fill=False):
         # Reactive function to calculate the average bill length (in mm)
         @render.text
         def bill_length():
-            return f"{filtered_df()['bill_length_mm'].mean():.1f} mm"
+            return f"{_stats()[1]:.1f} mm"
 
     # Value box showing the average bill depth of the filtered penguins
     with ui.value_box(
@@ -100,7 +173,7 @@ with ui.layout_column_wrap(fill=False):
         # Reactive function to calculate the average bill depth (in mm)
         @render.text
         def bill_depth():
-            return f"{filtered_df()['bill_depth_mm'].mean():.1f} mm"
+            return f"{_stats()[2]:.1f} mm"
 
 # Two cards displaying visualizations and data
 with ui.layout_columns():
@@ -109,43 +182,103 @@ with ui.layout_columns():
     with ui.card(full_screen=True):
         ui.card_header("Bill length and depth")
 
-        # Reactive function to render the scatter plot
+        # Reactive function to render the scatter plot from a cached PNG, drawn at the card's size
+        # (rounded to 50 px, so the last few pixels are scaled to fit) times the screen's pixel ratio
         @render.plot
         def length_depth():
-            return sns.scatterplot(
-                data=filtered_df(),  # Use the filtered dataset
-                x="bill_length_mm",  # X-axis: bill length
-                y="bill_depth_mm",  # Y-axis: bill depth
-                hue="species",  # Color points by species
-                palette={"Adelie": "#858ae3", "Gentoo": "#83c5be", "Chinstrap": "#023e8a"}  # Custom colors for species
-            )
+            width = _size_bucket(input[".clientdata_output_length_depth_width"]())
+            height = _size_bucket(input[".clientdata_output_length_depth_height"]())
+            pixelratio = input[".clientdata_pixelratio"]()
+            png = _scatter_png(*_selection(), width, height, pixelratio)
+            return Image.open(io.BytesIO(png))
 
     # Card displaying the summary statistics of the filtered dataset
     with ui.card(full_screen=True):
         ui.card_header("Penguin Data")
 
-        # Reactive function to render a data grid with selected columns
+        # Reactive function to render a data grid with the display columns
         @render.data_frame
         def summary_statistics():
-            cols = [
-                "species",  # Species of penguins
-                "island",  # Island where the penguins were found
-                "bill_length_mm",  # Bill length in mm
-                "bill_depth_mm",  # Bill depth in mm
-                "body_mass_g",  # Body mass in grams
-            ]
-            # Display the selected columns in a data grid with filter options
-            return render.DataGrid(filtered_df()[cols], filters=True)
+            # Display the filtered rows in a data grid with filter options
+            return render.DataGrid(df.take(filtered_idx()), filters=True)
 
 # Uncomment the line below to include external CSS (if available)
 # ui.include_css(app_dir / "styles.css")
 
+# Helper that does the actual filtering and returns the row positions of the matching penguins,
+# cached so revisited inputs reuse earlier results
+@functools.lru_cache(maxsize=64)
+def _filter_idx(species_key, mass):
+    # Apply the mass filter first: rows are in body mass order, so a binary search finds
+    # the rows below the selected maximum of each selected species without scanning them
+    parts = [
+        MASS_ORDER[sp][: np.searchsorted(SPECIES_STATS[sp][0], mass, side="left")]
+        for sp in species_key
+    ]
+    # Put the matching rows back in their original order
+    idx = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+    # The cached array is shared between calls, so make sure nobody modifies it
+    idx.setflags(write=False)
+    return idx
+
+# Helper that rounds an output size in CSS pixels to a 50 px bucket, so that small resizes
+# reuse cached plots instead of drawing new ones
+def _size_bucket(px):
+    return max(50, int(round(px / 50)) * 50)
+
+# Helper that renders the scatterplot for the selected penguins by updating the pre-drawn points,
+# cached as PNG bytes so revisited inputs skip drawing (the figure is shared, but each call sets
+# every collection and the size before saving)
+@functools.lru_cache(maxsize=64)
+def _scatter_png(species_key, mass, width, height, pixelratio):
+    shown = []
+    for sp, (points, offsets) in SCATTER_POINTS.items():
+        # Points are in body mass order, so the ones below the maximum come first
+        k = np.searchsorted(SPECIES_STATS[sp][0], mass, side="left")
+        points.set_offsets(offsets[:k])
+        points.set_visible(sp in species_key)
+        if sp in species_key and k > 0:
+            shown.append(points)
+    # Only list the species that are on the plot in the legend
+    if shown:
+        SCATTER_AX.legend(handles=shown, title="species")
+    elif SCATTER_AX.get_legend() is not None:
+        SCATTER_AX.get_legend().remove()
+    SCATTER_FIG.set_size_inches(width / SCATTER_DPI, height / SCATTER_DPI)
+    buf = io.BytesIO()
+    SCATTER_FIG.savefig(buf, format="png", dpi=SCATTER_DPI * pixelratio)
+    return buf.getvalue()
+
+# Helper that returns (count, mean bill length, mean bill depth) for the selected penguins
+# using the precomputed running totals, without building the filtered dataset
+def _summary_stats(species_key, mass):
+    count = 0
+    length_sum = depth_sum = 0.0
+    for sp in species_key:
+        mass_sorted, length_sums, depth_sums = SPECIES_STATS[sp]
+        # Number of penguins of this species below the selected maximum body mass
+        k = np.searchsorted(mass_sorted, mass, side="left")
+        count += int(k)
+        length_sum += length_sums[k]
+        depth_sum += depth_sums[k]
+    # Match pandas: the mean of no values is NaN
+    if count == 0:
+        return 0, float("nan"), float("nan")
+    return count, length_sum / count, depth_sum / count
+
+# Reactive function that reads the user inputs once per change, shared by every output
+@reactive.calc
+def _selection():
+    # Sort the species so the same selection always maps to the same cache entries
+    return tuple(sorted(input.species())), int(input.mass())
+
+# Reactive function that computes the three value-box statistics once per input change
+@reactive.calc
+def _stats():
+    return _summary_stats(*_selection())
+
 # Reactive function to filter the dataset based on user inputs (species and mass)
+# and return the row positions of the matching penguins (not a copy of the rows)
 @reactive.calc
-def filtered_df():
-    # Filter data by selected species
-    filt_df = df[df["species"].isin(input.species())]
-    # Filter data by selected maximum body mass
-    filt_df = filt_df.loc[filt_df["body_mass_g"] < input.mass()]
-    # Return the filtered dataset
-    return filt_df
+def filtered_idx():
+    return _filter_idx(*_selection())